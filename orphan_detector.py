@@ -10,6 +10,14 @@ Environment Variables:
     CATEGORY_FOLDERS    Category to folder mapping (e.g., Films=/mnt/films;Shows=/mnt/shows)
     EXCLUDE_PATTERNS    Comma-separated patterns to exclude (e.g., " - 720p.mkv,sample")
     IGNORE_SUFFIXES     Additional file suffixes to ignore (comma-separated)
+    FETCH_WORKERS       Concurrent torrent file-list requests (default: 16)
+    SCAN_WORKERS        Top-level folders walked concurrently (default: 16)
+    CACHE_DIR           Where the caches below are kept
+                        (default: ~/.cache/qbittorrent-orphaned, empty disables)
+    FILES_CACHE         Reuse file lists of finished torrents between runs
+                        (default: false; misses renames made in qBittorrent)
+    SCAN_CACHE          Reuse directory listings whose mtime is unchanged
+                        (default: false)
 """
 
 from __future__ import annotations
@@ -17,10 +25,22 @@ import os
 import re
 import sys
 import json
+import time
 import requests
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Set
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import filterfalse
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+from urllib3.util.retry import Retry
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+try:  # optional, much faster JSON parser (pip install qbittorrent-orphaned[fast])
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
 
 ##############################################################################
 # 1. Configuration helpers
@@ -34,6 +54,19 @@ def parse_list(raw: str) -> List[str]:
     """Parse comma-separated list from env var."""
     return [p.strip() for p in raw.split(",") if p.strip()]
 
+def getenv_workers(name: str, default: int) -> int:
+    """Read a positive worker count, falling back to `default` if invalid."""
+    raw = getenv(name, str(default))
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        print(f"⚠️  Ignoring invalid {name} value {raw!r}, using {default}")
+        return default
+
+def parse_bool(raw: str) -> bool:
+    """Parse an on/off env var ('1', 'true', 'yes', 'on' mean on)."""
+    return raw.lower() in ("1", "true", "yes", "on")
+
 QBIT_HOST = getenv("QBIT_HOST", "http://qbittorrent:8080").rstrip("/")
 QBIT_USER = getenv("QBIT_USER", "admin")
 QBIT_PASS = getenv("QBIT_PASS", "password")
@@ -69,16 +102,50 @@ IGNORE_SUFFIXES = DEFAULT_IGNORE_SUFFIXES | {s if s.startswith('.') else f'.{s}'
 # Patterns are matched case-insensitively against the full relative path
 EXCLUDE_PATTERNS = parse_list(getenv("EXCLUDE_PATTERNS", ""))
 
+# Directory holding the opt-in caches below
+CACHE_DIR = getenv("CACHE_DIR", str(
+    Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache") / "qbittorrent-orphaned"
+))
+
+# Reuse file lists of finished torrents between runs. Off by default: a file
+# or folder renamed inside a torrent (torrents/renameFile, renameFolder)
+# changes neither its size nor its content path, so a cached list keeps the
+# old names and the renamed file would be reported as an orphan.
+FILES_CACHE = parse_bool(getenv("FILES_CACHE", "false"))
+
+# Also cache directory listings and only re-list directories whose mtime
+# changed. Off by default: some network filesystems do not update mtimes.
+SCAN_CACHE = parse_bool(getenv("SCAN_CACHE", "false"))
+
 ##############################################################################
 # 2. Connect to qBittorrent and fetch torrent file lists
 ##############################################################################
 
+# Parse API responses straight from the raw bytes, with orjson when present
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Number of concurrent /torrents/files requests (the fetch is latency-bound)
+FETCH_WORKERS = getenv_workers("FETCH_WORKERS", 16)
+
 class Qbit:
     """Very small wrapper around the qBittorrent Web API v2."""
 
     def __init__(self, host: str, user: str, password: str) -> None:
         self.api = host + "/api/v2"
         self.session = requests.Session()
+        # Keep one pooled connection per worker so parallel fetches reuse
+        # them, and retry transient connection errors instead of aborting.
+        # requests already asks for gzip/deflate responses by default.
+        adapter = HTTPAdapter(
+            pool_connections=FETCH_WORKERS,
+            pool_maxsize=FETCH_WORKERS,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if urlparse(host).hostname in ("localhost", "127.0.0.1", "::1"):
+            # No proxy/netrc lookups from the environment on every request
+            self.session.trust_env = False
         self.login(user, password)
 
     def login(self, user: str, password: str) -> None:
@@ -96,11 +163,21 @@ class Qbit:
                 return
         sys.exit(f"❌  Login to qBittorrent failed (HTTP {r.status_code}): {r.text!r}")
 
-    def torrents(self) -> list[dict]:
-        """Return list of torrents with at least hash, category."""
-        r = self.session.get(self.api + "/torrents/info", timeout=20)
+    def torrents(self, category: str | None = None) -> list[dict]:
+        """
+        Return list of torrents with at least hash, category.  With
+        `category`, qBittorrent filters server-side ("" = uncategorized).
+        """
+        if category is None:
+            r = self.session.get(self.api + "/torrents/info", timeout=20)
+        else:
+            r = self.session.get(
+                self.api + "/torrents/info",
+                params={"category": category},
+                timeout=20
+            )
         r.raise_for_status()
-        return r.json()
+        return _json_loads(r.content)
 
     def files_for(self, torrent_hash: str) -> list[dict]:
         r = self.session.get(
@@ -109,21 +186,115 @@ class Qbit:
             timeout=20
         )
         r.raise_for_status()
-        return r.json()
+        return _json_loads(r.content)
+
+def load_cache(path: Path) -> Dict[str, dict]:
+    """Load a JSON cache file written by save_cache()."""
+    try:
+        with path.open(encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Ignoring unreadable cache {path}: {e}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def save_cache(path: Path, cache: Dict[str, dict]) -> None:
+    """Atomically replace the cache file; failures only cost the next run."""
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tmp.open("w", encoding="utf-8") as fh:
+            json.dump(cache, fh)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"⚠️  Could not write cache {path}: {e}")
+
+def _cache_stamp(t: dict) -> list | None:
+    """
+    Value a cached file list must match to be reused, or None while the
+    torrent is still downloading (its file list may still change).
+
+    qBittorrent exposes nothing that changes when files inside a torrent are
+    renamed, so such a rename is not detected; hence FILES_CACHE is opt-in.
+    """
+    if t.get("progress") != 1:
+        return None
+    return [t.get("total_size"), t.get("content_path")]
+
+def _is_files_entry(entry) -> bool:
+    """
+    Whether a files.json entry has the {"stamp": …, "files": [str, …]}
+    shape fetch_torrent_files() writes; anything else is fetched again.
+    """
+    return (isinstance(entry, dict) and "stamp" in entry
+            and isinstance(entry.get("files"), list)
+            and all(isinstance(name, str) for name in entry["files"]))
 
-def fetch_torrent_files(qbit: Qbit) -> Dict[str, Set[str]]:
+def fetch_torrent_files(qbit: Qbit,
+                        cache: Dict[str, dict] | None = None,
+                        categories: Iterable[str] | None = None) -> Dict[str, Set[str]]:
     """
     Return {category → set(relative_path.lower())}.
     We store relative paths as qBittorrent reports them (inside the torrent),
     in lowercase so comparison is case-insensitive on Windows.
+
+    With `categories`, only torrents in those categories are listed (and
+    their files fetched); "__UNCATEGORIZED__" selects torrents without one.
+
+    `cache` maps torrent hash → {"stamp": …, "files": [normalized names]}.
+    Finished torrents whose stamp still matches are not fetched again; on
+    return the cache holds exactly the finished torrents seen in this run.
     """
     cat_files: Dict[str, Set[str]] = defaultdict(set)
-
-    for t in qbit.torrents():
+    if cache is None:
+        cache = {}
+
+    if categories is None:
+        torrents = qbit.torrents()
+    else:
+        # With subcategories enabled, ?category=Films also returns Films/4K
+        # torrents, so keep only exact matches, and each hash only once.
+        wanted = dict.fromkeys(categories)
+        by_hash: Dict[str, dict] = {}
+        for category in wanted:
+            for t in qbit.torrents("" if category == "__UNCATEGORIZED__" else category):
+                if (t.get("category") or "__UNCATEGORIZED__") in wanted:
+                    by_hash.setdefault(t["hash"], t)
+        torrents = list(by_hash.values())
+    entries: Dict[str, dict] = {}
+    missing = []
+    for t in torrents:
+        stamp = _cache_stamp(t)
+        entry = cache.get(t["hash"])
+        if stamp is not None and _is_files_entry(entry) and entry["stamp"] == stamp:
+            entries[t["hash"]] = entry
+        else:
+            missing.append(t)
+
+    # qBittorrent has no batched /torrents/files, so the missing hashes cost
+    # one request each: run them concurrently, but collect the results here
+    # on the main thread.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        hashes = [t["hash"] for t in missing]
+        for t, files in zip(missing, pool.map(qbit.files_for, hashes)):
+            entries[t["hash"]] = {
+                "stamp": _cache_stamp(t),
+                # lower() first: replace() then returns the very same
+                # string when there is no backslash, so one allocation
+                "files": [f["name"].lower().replace("\\", "/") for f in files],
+            }
+
+    # Names are interned so the disk side (see on_disk) ends up sharing the
+    # very same string objects: one copy in memory, identity-fast lookups.
+    for t in torrents:
         category = t.get("category") or "__UNCATEGORIZED__"
-        for f in qbit.files_for(t["hash"]):
-            name = f["name"].replace("\\", "/").lower()
-            cat_files[category].add(name)
+        cat_files[category].update(map(sys.intern, entries[t["hash"]]["files"]))
+
+    # Drop removed torrents and keep only finished ones
+    cache.clear()
+    cache.update({h: e for h, e in entries.items() if e["stamp"] is not None})
 
     return cat_files
 
@@ -131,57 +302,240 @@ def fetch_torrent_files(qbit: Qbit) -> Dict[str, Set[str]]:
 # 3. Walk disk and detect orphaned files
 ##############################################################################
 
+@lru_cache(maxsize=None)
+def _exclude_matcher(patterns: tuple) -> Callable[[str], bool] | None:
+    """
+    Build a predicate over an already lowercased, '/'-separated path,
+    specialized for the pattern count: None for no patterns, one substring
+    test for a single pattern, a loop over a tuple otherwise.  Plain `in`
+    tests beat a compiled alternation, which re scans several times slower.
+
+    Patterns are normalized the same way, so Windows-style ones such as
+    "Extras\\" keep matching.
+    """
+    lowered = tuple(p.lower().replace("\\", "/") for p in patterns)
+    if not lowered:
+        return None
+    if len(lowered) == 1:
+        only = lowered[0]
+        return lambda path_norm: only in path_norm
+
+    def matches(path_norm: str) -> bool:
+        for pattern in lowered:
+            if pattern in path_norm:
+                return True
+        return False
+    return matches
+
+# Number of top-level folders of a category walked concurrently
+SCAN_WORKERS = getenv_workers("SCAN_WORKERS", 16)
+
+# On Windows the directory listing already carries the file size, so
+# DirEntry.stat() is free; elsewhere it would cost one lstat() per file.
+_DIRENTRY_STAT_IS_FREE = os.name == "nt"
+
 def should_exclude(path_str: str) -> bool:
     """Check if a path should be excluded based on EXCLUDE_PATTERNS."""
-    path_lower = path_str.lower()
-    for pattern in EXCLUDE_PATTERNS:
-        if pattern.lower() in path_lower:
-            return True
-    return False
+    matcher = _exclude_matcher(tuple(EXCLUDE_PATTERNS))
+    return matcher is not None and matcher(path_str.lower().replace("\\", "/"))
+
+# normalized_rel_path → [(rel_path, size), …]; a list because a
+# case-sensitive filesystem can hold several spellings of one key
+DiskFiles = Dict[str, List[Tuple[str, Optional[int]]]]
+
+# A directory listing is only cached once its mtime is older than this;
+# coarse filesystem timestamps (e.g. 2 s on FAT) could otherwise let a
+# change made right after the scan keep the same mtime.
+MTIME_SLACK_NS = 2_000_000_000
 
-def on_disk(category: str, root: Path) -> Set[Path]:
+def _is_listing(cached) -> bool:
     """
-    Return every file under `root`, relative to `root`, excluding unwanted
-    extensions and patterns.
+    Whether a scan.json entry has the [mtime_ns, file_names, subdir_names]
+    shape _scan_dir() writes; anything else is treated as a cache miss.
     """
-    files: Set[Path] = set()
-    if not root.exists():
-        print(f"⚠️  Folder for category '{category}' does not exist: {root}")
-        return files
+    return (isinstance(cached, list) and len(cached) == 3
+            and isinstance(cached[0], int)
+            and isinstance(cached[1], list) and isinstance(cached[2], list)
+            and all(isinstance(name, str) for name in cached[1])
+            and all(isinstance(name, str) for name in cached[2]))
 
-    for path in root.rglob("*"):
-        if not path.is_file():
-            continue
-        if path.suffix.lower() in IGNORE_SUFFIXES:
+def _read_dir(directory: str) -> Tuple[List[str], List[str], Dict[str, int]] | None:
+    """
+    Return (file_names, subdir_names, {file_name: size}) of one directory,
+    or None if it could not be listed (so a failed listing is never mistaken
+    for an empty directory, nor cached as one).
+    """
+    file_names: List[str] = []
+    dir_names: List[str] = []
+    sizes: Dict[str, int] = {}
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    dir_names.append(entry.name)
+                elif entry.is_file():
+                    file_names.append(entry.name)
+                    if _DIRENTRY_STAT_IS_FREE:
+                        try:
+                            sizes[entry.name] = entry.stat().st_size
+                        except OSError:
+                            pass
+    except OSError:
+        return None
+    return file_names, dir_names, sizes
+
+def _scan_dir(directory: str, prefix: str, prefix_norm: str,
+              ignore: tuple, exclude: Callable[[str], bool] | None, files: DiskFiles,
+              seen: Dict[str, list] | None = None,
+              known: Dict[str, list] | None = None) -> List[Tuple[str, str, str]]:
+    """
+    List one directory: add its wanted files to `files` and return its
+    subdirectories as (path, rel_prefix, normalized_rel_prefix) tuples.
+
+    With `seen`, the raw listing is recorded there as
+    {rel_prefix: [mtime_ns, file_names, subdir_names]}; if `known` holds an
+    entry with the directory's current mtime, that listing is reused
+    instead of reading the directory again.
+    """
+    if seen is None:
+        listing = _read_dir(directory)
+        if listing is None:
+            return []
+        file_names, dir_names, sizes = listing
+    else:
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        cached = known.get(prefix) if known else None
+        if _is_listing(cached) and cached[0] == mtime:
+            file_names, dir_names, sizes = cached[1], cached[2], {}
+        else:
+            listing = _read_dir(directory)
+            if listing is None:
+                # Not recorded: the next run must list it again
+                return []
+            file_names, dir_names, sizes = listing
+        if time.time_ns() - mtime > MTIME_SLACK_NS:
+            seen[prefix] = [mtime, file_names, dir_names]
+
+    for name in file_names:
+        name_norm = name.lower()
+        # A dotfile named exactly like a suffix (".nfo") has no suffix
+        if name_norm.endswith(ignore) and name_norm not in ignore:
             continue
         # Skip macOS resource fork files
-        if path.name.startswith("._"):
+        if name.startswith("._"):
             continue
+        rel_norm = prefix_norm + name_norm
         # Check exclude patterns
-        rel_path = str(path.relative_to(root))
-        if should_exclude(rel_path):
+        if exclude is not None and exclude(rel_norm):
             continue
-        files.add(path.relative_to(root))
+        found = (prefix + name, sizes.get(name))
+        spellings = files.get(rel_norm)
+        if spellings is None:
+            files[sys.intern(rel_norm)] = [found]
+        else:
+            spellings.append(found)
+
+    return [(os.path.join(directory, name), prefix + name + "/",
+             prefix_norm + name.lower() + "/") for name in dir_names]
+
+def _walk(top: Tuple[str, str, str], ignore: tuple,
+          exclude: Callable[[str], bool] | None,
+          seen: Dict[str, list] | None = None,
+          known: Dict[str, list] | None = None) -> DiskFiles:
+    """Depth-first walk of the subtree `top` (a _scan_dir() tuple)."""
+    files: DiskFiles = {}
+    stack = [top]
+    while stack:
+        stack += _scan_dir(*stack.pop(), ignore, exclude, files, seen, known)
     return files
 
-def detect_orphans(cat_files: Dict[str, Set[str]]) -> Dict[str, list[Path]]:
+def on_disk(category: str, root: Path,
+            scan_cache: Dict[str, dict] | None = None) -> DiskFiles:
+    """
+    Return every file under `root`, excluding unwanted extensions and
+    patterns, as {normalized_rel_path → [(rel_path, size), …]}.  Paths are
+    '/'-separated and relative to `root`; the key is lowercased for
+    comparison with the torrent side, each rel_path keeps its on-disk casing
+    for display (several when a case-sensitive filesystem holds e.g. both
+    A.mkv and a.mkv).  size is None when it was not free to read during the
+    walk.
+
+    With `scan_cache` ({root → directory listings}), directories whose mtime
+    is unchanged since the previous run are not listed again; the entry for
+    `root` is replaced with the listings seen in this run.
+    """
+    files: DiskFiles = {}
+    if not root.exists():
+        print(f"⚠️  Folder for category '{category}' does not exist: {root}")
+        if scan_cache is not None:
+            scan_cache.pop(str(root), None)
+        return files
+
+    seen = known = None
+    if scan_cache is not None:
+        seen, known = {}, scan_cache.get(str(root))
+        if not isinstance(known, dict):
+            known = None
+
+    # str.endswith() takes a tuple and checks all suffixes in one C call
+    ignore = tuple(suffix.lower() for suffix in IGNORE_SUFFIXES)
+    exclude = _exclude_matcher(tuple(EXCLUDE_PATTERNS))
+    # DFS over os.scandir(): DirEntry caches the file type from the
+    # directory listing, so we avoid a stat() and a Path object per entry.
+    # Each top-level subdirectory (one per show/movie, typically) is walked
+    # on its own thread; os.scandir() releases the GIL while it waits on the
+    # filesystem, which is what dominates on NAS and network mounts.
+    subdirs = _scan_dir(str(root), "", "", ignore, exclude, files, seen, known)
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as pool:
+        walked = pool.map(lambda top: _walk(top, ignore, exclude, seen, known), subdirs)
+        for subtree in walked:
+            # Subtrees can share keys (e.g. top-level "Show/" and "show/")
+            for rel_norm, spellings in subtree.items():
+                existing = files.get(rel_norm)
+                if existing is None:
+                    files[rel_norm] = spellings
+                else:
+                    existing.extend(spellings)
+
+    if scan_cache is not None:
+        scan_cache[str(root)] = seen
+    return files
+
+def detect_orphans(cat_files: Dict[str, Set[str]],
+                   scan_cache: Dict[str, dict] | None = None) -> Dict[str, Dict[Path, Optional[int]]]:
     """
     Compare torrent files with real files per category and return
-    {category → [orphan_path, …]} (full absolute paths).
+    {category → {orphan_path: size, …}} (full absolute paths; size is None
+    when on_disk() could not read it for free).  `scan_cache` is passed on
+    to on_disk(); roots no longer configured are dropped from it.
     """
-    orphans: Dict[str, list[Path]] = defaultdict(list)
+    orphans: Dict[str, Dict[Path, Optional[int]]] = defaultdict(dict)
 
     for category, folder in CATEGORY_MAP.items():
-        disk_files = on_disk(category, folder)
+        disk_files = on_disk(category, folder, scan_cache)
         if not disk_files:
             continue
 
-        torrent_files = cat_files.get(category, set())
+        torrent_files = cat_files.get(category)
+
+        if torrent_files:
+            # filterfalse + set.__contains__ runs the membership tests in C
+            # without first copying every disk key into a new set
+            candidates = filterfalse(torrent_files.__contains__, disk_files)
+        else:
+            # No torrent in this category: every file is an orphan
+            candidates = iter(disk_files)
+        for rel_norm in candidates:
+            for rel_path, size in disk_files[rel_norm]:
+                orphans[category][folder / rel_path] = size
 
-        for rel_path in disk_files:
-            rel_norm = str(rel_path).replace("\\", "/").lower()
-            if rel_norm not in torrent_files:
-                orphans[category].append(folder / rel_path)
+    if scan_cache is not None:
+        roots = {str(folder) for folder in CATEGORY_MAP.values()}
+        for stale in set(scan_cache) - roots:
+            del scan_cache[stale]
 
     return orphans
 
@@ -197,22 +551,39 @@ def human_size(num: int) -> str:
 
 def main() -> None:
     qbit = Qbit(QBIT_HOST, QBIT_USER, QBIT_PASS)
-    cat_files = fetch_torrent_files(qbit)
-    orphans = detect_orphans(cat_files)
+    cache_file = Path(CACHE_DIR) / "files.json" if CACHE_DIR and FILES_CACHE else None
+    cache = load_cache(cache_file) if cache_file else {}
+    # Torrents outside the mapped categories are never compared, so skip them
+    cat_files = fetch_torrent_files(qbit, cache, CATEGORY_MAP.keys())
+    if cache_file:
+        save_cache(cache_file, cache)
+    scan_file = Path(CACHE_DIR) / "scan.json" if CACHE_DIR and SCAN_CACHE else None
+    scan_cache = load_cache(scan_file) if scan_file else None
+    orphans = detect_orphans(cat_files, scan_cache)
+    if scan_file:
+        save_cache(scan_file, scan_cache)
 
     if not orphans:
         print("✅  No orphaned files found.")
         return
 
     for category in sorted(orphans):
-        print(f"\n===== {category} =====")
-        for p in sorted(orphans[category]):
-            try:
-                size = p.stat().st_size
-                print(f"{p}    ({human_size(size)})")
-            except FileNotFoundError:
-                # file disappeared while we were running
-                print(f"{p}    (missing?)")
+        # Build each category's report and write it in one go rather than
+        # one print() (lock, encode, flush) per orphan.
+        lines = [f"\n===== {category} ====="]
+        sizes = orphans[category]
+        for p in sorted(sizes):
+            size = sizes[p]
+            if size is None:
+                try:
+                    size = p.stat().st_size
+                except FileNotFoundError:
+                    # file disappeared while we were running
+                    lines.append(f"{p}    (missing?)")
+                    continue
+            lines.append(f"{p}    ({human_size(size)})")
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
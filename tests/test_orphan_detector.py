@@ -3,6 +3,7 @@
 import pytest
 import tempfile
 import os
+import json
 import importlib
 from pathlib import Path
 from unittest.mock import patch, MagicMock
@@ -119,6 +120,61 @@ class TestModuleGlobals:
         assert mod.EXCLUDE_PATTERNS == ["720p", "sample"]
 
 
+    def test_fetch_workers_default(self, reimported):
+        os.environ.pop("FETCH_WORKERS", None)
+        mod = _import_fresh()
+        assert mod.FETCH_WORKERS == 16
+
+    def test_fetch_workers_override(self, reimported):
+        mod = _import_fresh({"FETCH_WORKERS": "64"})
+        assert mod.FETCH_WORKERS == 64
+
+    def test_fetch_workers_at_least_one(self, reimported):
+        mod = _import_fresh({"FETCH_WORKERS": "0"})
+        assert mod.FETCH_WORKERS == 1
+
+    @pytest.mark.parametrize("raw", ["", "sixteen", "4.5"])
+    def test_invalid_worker_counts_fall_back(self, reimported, capsys, raw):
+        mod = _import_fresh({"FETCH_WORKERS": raw, "SCAN_WORKERS": raw})
+        assert mod.FETCH_WORKERS == 16
+        assert mod.SCAN_WORKERS == 16
+        out = capsys.readouterr().out
+        assert "Ignoring invalid FETCH_WORKERS" in out
+        assert "Ignoring invalid SCAN_WORKERS" in out
+
+    def test_scan_workers_override(self, reimported):
+        mod = _import_fresh({"SCAN_WORKERS": "4"})
+        assert mod.SCAN_WORKERS == 4
+
+    def test_files_cache_off_by_default(self, reimported):
+        os.environ.pop("FILES_CACHE", None)
+        mod = _import_fresh()
+        assert mod.FILES_CACHE is False
+
+    def test_files_cache_enabled(self, reimported):
+        mod = _import_fresh({"FILES_CACHE": "yes"})
+        assert mod.FILES_CACHE is True
+
+    def test_scan_cache_off_by_default(self, reimported):
+        os.environ.pop("SCAN_CACHE", None)
+        mod = _import_fresh()
+        assert mod.SCAN_CACHE is False
+
+    def test_scan_cache_enabled(self, reimported):
+        mod = _import_fresh({"SCAN_CACHE": "true"})
+        assert mod.SCAN_CACHE is True
+
+    def test_cache_dir_override(self, reimported):
+        mod = _import_fresh({"CACHE_DIR": "/tmp/qbo-cache"})
+        assert mod.CACHE_DIR == "/tmp/qbo-cache"
+
+    def test_cache_dir_defaults_to_xdg_cache(self, reimported):
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": "/tmp/xdg"}, clear=False):
+            os.environ.pop("CACHE_DIR", None)
+            mod = _import_fresh()
+        assert Path(mod.CACHE_DIR) == Path("/tmp/xdg/qbittorrent-orphaned")
+
+
 class TestParseList:
     def test_comma_separated(self):
         assert parse_list("a, b, c") == ["a", "b", "c"]
@@ -173,6 +229,27 @@ class TestShouldExclude:
         with patch.object(orphan_detector, "EXCLUDE_PATTERNS", ["720p", "sample"]):
             assert orphan_detector.should_exclude("Movie/Movie.1080p.mkv") is False
 
+    def test_single_pattern(self):
+        import orphan_detector
+        with patch.object(orphan_detector, "EXCLUDE_PATTERNS", ["Sample"]):
+            assert orphan_detector.should_exclude("Movie/sample.mkv") is True
+            assert orphan_detector.should_exclude("Movie/Movie.mkv") is False
+
+    def test_metacharacters_are_literal(self):
+        import orphan_detector
+        with patch.object(orphan_detector, "EXCLUDE_PATTERNS", ["(1).", "a+b"]):
+            assert orphan_detector.should_exclude("Movie (1).mkv") is True
+            assert orphan_detector.should_exclude("a+b.mkv") is True
+            assert orphan_detector.should_exclude("Movie 1 mkv") is False
+            assert orphan_detector.should_exclude("aab.mkv") is False
+
+    def test_backslash_separators(self):
+        import orphan_detector
+        with patch.object(orphan_detector, "EXCLUDE_PATTERNS", ["Extras\\"]):
+            assert orphan_detector.should_exclude("Show/Extras/x.mkv") is True
+            assert orphan_detector.should_exclude("Show\\Extras\\x.mkv") is True
+            assert orphan_detector.should_exclude("Show/Extras.mkv") is False
+
     def test_empty_patterns(self):
         import orphan_detector
         with patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
@@ -191,8 +268,40 @@ class TestOnDisk:
             with patch.object(orphan_detector, "IGNORE_SUFFIXES", {".nfo", ".jpg"}), \
                  patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
                 files = orphan_detector.on_disk("TestCat", root)
-            assert Path("movie.mkv") in files
-            assert Path("subdir/episode.mkv") in files
+            assert "movie.mkv" in files
+            assert "subdir/episode.mkv" in files
+
+    def test_keys_are_lowercased_values_keep_case(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "Show").mkdir()
+            (root / "Show" / "Episode.MKV").touch()
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                files = orphan_detector.on_disk("TestCat", root)
+            assert set(files) == {"show/episode.mkv"}
+            assert [p for p, _ in files["show/episode.mkv"]] == ["Show/Episode.MKV"]
+
+    def test_walks_many_top_level_folders(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            expected = {"top.mkv"}
+            for i in range(20):
+                season = root / f"Show{i}" / "Season 1"
+                season.mkdir(parents=True)
+                (season / "E01.mkv").touch()
+                expected.add(f"show{i}/season 1/e01.mkv")
+            (root / "top.mkv").touch()
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []), \
+                 patch.object(orphan_detector, "SCAN_WORKERS", 4):
+                files = orphan_detector.on_disk("TestCat", root)
+            assert set(files) == expected
+            assert files["show3/season 1/e01.mkv"][0][0] == "Show3/Season 1/E01.mkv"
 
     def test_ignores_suffixes(self):
         import orphan_detector
@@ -205,9 +314,35 @@ class TestOnDisk:
             with patch.object(orphan_detector, "IGNORE_SUFFIXES", {".nfo", ".jpg"}), \
                  patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
                 files = orphan_detector.on_disk("TestCat", root)
-            assert Path("movie.mkv") in files
-            assert Path("cover.jpg") not in files
-            assert Path("info.nfo") not in files
+            assert "movie.mkv" in files
+            assert "cover.jpg" not in files
+            assert "info.nfo" not in files
+
+    def test_ignores_suffixes_case_insensitively(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "movie.mkv").touch()
+            (root / "COVER.JPG").touch()
+            (root / "subs.ASS").touch()
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", {".jpg", ".Ass"}), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                files = orphan_detector.on_disk("TestCat", root)
+            assert set(files) == {"movie.mkv"}
+
+    def test_dotfile_named_like_a_suffix_is_kept(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / ".nfo").touch()
+            (root / ".hidden.nfo").touch()
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", {".nfo"}), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                files = orphan_detector.on_disk("TestCat", root)
+            # Same as Path(".nfo").suffix == "" in the rglob version
+            assert set(files) == {".nfo"}
 
     def test_skips_macos_resource_forks(self):
         import orphan_detector
@@ -219,15 +354,159 @@ class TestOnDisk:
             with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
                  patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
                 files = orphan_detector.on_disk("TestCat", root)
-            assert Path("real.mkv") in files
-            assert Path("._hidden") not in files
+            assert "real.mkv" in files
+            assert "._hidden" not in files
+
+    @pytest.mark.skipif(not hasattr(os, "symlink") or os.name == "nt",
+                        reason="symlinks need privileges on Windows")
+    def test_does_not_follow_directory_symlinks(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             tempfile.TemporaryDirectory() as elsewhere:
+            root = Path(tmpdir)
+            (Path(elsewhere) / "outside.mkv").touch()
+            (root / "linked").symlink_to(elsewhere, target_is_directory=True)
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                files = orphan_detector.on_disk("TestCat", root)
+            assert files == {}
+
+    def test_sizes_only_read_when_free(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "movie.mkv").write_bytes(b"x" * 1234)
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                with patch.object(orphan_detector, "_DIRENTRY_STAT_IS_FREE", True):
+                    assert orphan_detector.on_disk("TestCat", root) == {
+                        "movie.mkv": [("movie.mkv", 1234)]}
+                with patch.object(orphan_detector, "_DIRENTRY_STAT_IS_FREE", False):
+                    assert orphan_detector.on_disk("TestCat", root) == {
+                        "movie.mkv": [("movie.mkv", None)]}
 
     def test_nonexistent_folder(self):
         import orphan_detector
         with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
              patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
             files = orphan_detector.on_disk("TestCat", Path("/nonexistent/path"))
-        assert files == set()
+        assert files == {}
+
+
+class TestScanCache:
+    def _on_disk(self, root, scan_cache):
+        import orphan_detector
+        with patch.object(orphan_detector, "IGNORE_SUFFIXES", {".nfo"}), \
+             patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+            return orphan_detector.on_disk("TestCat", root, scan_cache)
+
+    def test_unchanged_directories_are_not_relisted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            show = root / "Show"
+            show.mkdir()
+            (show / "E01.mkv").touch()
+            (show / "E01.nfo").touch()
+            old = 1_000_000_000
+            for d in (show, root):
+                os.utime(d, (old, old))
+
+            scan_cache = {}
+            assert set(self._on_disk(root, scan_cache)) == {"show/e01.mkv"}
+            mtime, file_names, dir_names = scan_cache[str(root)]["Show/"]
+            # Raw listing: filters are applied on reuse, not baked in
+            assert mtime == old * 10 ** 9
+            assert sorted(file_names) == ["E01.mkv", "E01.nfo"]
+            assert dir_names == []
+            assert scan_cache[str(root)][""][2] == ["Show"]
+
+            # A new file behind an unchanged mtime is not seen...
+            (show / "E02.mkv").touch()
+            os.utime(show, (old, old))
+            assert set(self._on_disk(root, scan_cache)) == {"show/e01.mkv"}
+
+            # ...until the directory's mtime moves
+            os.utime(show, (old + 10, old + 10))
+            assert set(self._on_disk(root, scan_cache)) == {"show/e01.mkv", "show/e02.mkv"}
+
+    def test_failed_listing_is_not_cached(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            show = root / "Show"
+            show.mkdir()
+            (show / "E01.mkv").touch()
+            old = 1_000_000_000
+            for d in (show, root):
+                os.utime(d, (old, old))
+
+            real_scandir = os.scandir
+
+            def flaky_scandir(path):
+                if os.path.basename(path) == "Show":
+                    raise OSError(5, "Input/output error")
+                return real_scandir(path)
+
+            scan_cache = {}
+            with patch("orphan_detector.os.scandir", side_effect=flaky_scandir):
+                assert self._on_disk(root, scan_cache) == {}
+            assert "Show/" not in scan_cache[str(root)]
+
+            # The next, healthy run lists the directory again
+            assert set(self._on_disk(root, scan_cache)) == {"show/e01.mkv"}
+
+    def test_malformed_entries_are_misses(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             tempfile.TemporaryDirectory() as cache_dir:
+            root = Path(tmpdir)
+            show = root / "Show"
+            show.mkdir()
+            (show / "E01.mkv").touch()
+            old = 1_000_000_000
+            for d in (show, root):
+                os.utime(d, (old, old))
+            mtime = old * 10 ** 9
+
+            cache_path = Path(cache_dir) / "scan.json"
+            for listings in ({"": 5, "Show/": [mtime, [1], []]},
+                             {"": [mtime], "Show/": [mtime, "E01.mkv", []]},
+                             {"": None, "Show/": ["x", [], []]},
+                             "not a dict", [1, 2]):
+                cache_path.write_text(json.dumps({str(root): listings}))
+                scan_cache = orphan_detector.load_cache(cache_path)
+                assert set(self._on_disk(root, scan_cache)) == {"show/e01.mkv"}
+                assert scan_cache[str(root)]["Show/"][1] == ["E01.mkv"]
+
+    def test_recently_modified_directories_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "movie.mkv").touch()
+
+            scan_cache = {}
+            self._on_disk(root, scan_cache)
+            assert scan_cache == {str(root): {}}
+
+    def test_missing_root_dropped(self):
+        scan_cache = {"/nonexistent/path": {"": [1, [], []]}}
+        assert self._on_disk(Path("/nonexistent/path"), scan_cache) == {}
+        assert scan_cache == {}
+
+    def test_unconfigured_roots_dropped(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "movie.mkv").touch()
+            scan_cache = {"/old/root": {"": [1, [], []]}}
+
+            with patch.object(orphan_detector, "CATEGORY_MAP", {"TestCat": root}), \
+                 patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                orphan_detector.detect_orphans({}, scan_cache)
+
+            assert set(scan_cache) == {str(root)}
 
 
 class TestDetectOrphans:
@@ -266,6 +545,62 @@ class TestDetectOrphans:
             assert orphans == {} or all(len(v) == 0 for v in orphans.values())
 
 
+    def test_case_insensitive_match_keeps_disk_casing(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "Tracked.MKV").touch()
+            (root / "Orphan.MKV").touch()
+
+            torrent_files = {"TestCat": {"tracked.mkv"}}
+
+            with patch.object(orphan_detector, "CATEGORY_MAP", {"TestCat": root}), \
+                 patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                orphans = orphan_detector.detect_orphans(torrent_files)
+
+            assert list(orphans["TestCat"]) == [root / "Orphan.MKV"]
+
+
+    def test_category_without_torrents(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "a.mkv").touch()
+            (root / "b.mkv").touch()
+
+            with patch.object(orphan_detector, "CATEGORY_MAP", {"TestCat": root}), \
+                 patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                orphans = orphan_detector.detect_orphans({})
+
+            assert set(orphans["TestCat"]) == {root / "a.mkv", root / "b.mkv"}
+
+
+    def test_case_variants_are_all_reported(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "Show").mkdir()
+            (root / "A.mkv").touch()
+            (root / "Show" / "E01.mkv").touch()
+            if (root / "a.mkv").exists():
+                pytest.skip("case-insensitive filesystem")
+            (root / "a.mkv").touch()
+            (root / "show").mkdir()
+            (root / "show" / "e01.mkv").touch()
+
+            with patch.object(orphan_detector, "CATEGORY_MAP", {"TestCat": root}), \
+                 patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
+                orphans = orphan_detector.detect_orphans({})
+
+            assert set(orphans["TestCat"]) == {
+                root / "A.mkv", root / "a.mkv",
+                root / "Show" / "E01.mkv", root / "show" / "e01.mkv",
+            }
+
+
 class TestDetectOrphansEdgeCases:
     def test_empty_disk_files_skipped(self):
         """Cover line 170-171: empty disk_files triggers continue."""
@@ -295,8 +630,22 @@ class TestDetectOrphansEdgeCases:
                  patch.object(orphan_detector, "EXCLUDE_PATTERNS", ["720p"]):
                 files = orphan_detector.on_disk("TestCat", root)
 
-            assert Path("movie.mkv") in files
-            assert Path("movie - 720p.mkv") not in files
+            assert "movie.mkv" in files
+            assert "movie - 720p.mkv" not in files
+
+    def test_backslash_exclude_pattern_in_on_disk(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            root = Path(tmpdir)
+            (root / "Show" / "Extras").mkdir(parents=True)
+            (root / "Show" / "Extras" / "x.mkv").touch()
+            (root / "Show" / "E01.mkv").touch()
+
+            with patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
+                 patch.object(orphan_detector, "EXCLUDE_PATTERNS", ["Show\\Extras\\"]):
+                files = orphan_detector.on_disk("TestCat", root)
+
+            assert set(files) == {"show/e01.mkv"}
 
 
 class TestHumanSize:
@@ -357,6 +706,45 @@ class TestQbit:
     def test_init_and_login_success_qbit_ver_lt_5_2(self):
         return self._test_init_and_login_success(qbit_ver_gte_5_2=False)
 
+    def test_session_uses_pooled_adapter(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session):
+            orphan_detector.Qbit("http://localhost:8080", "admin", "pass")
+
+        mounted = {c.args[0]: c.args[1] for c in mock_session.mount.call_args_list}
+        assert set(mounted) == {"http://", "https://"}
+        assert mounted["http://"]._pool_maxsize == orphan_detector.FETCH_WORKERS
+
+    def test_session_retries_transient_errors(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session):
+            orphan_detector.Qbit("http://qbittorrent:8080", "admin", "pass")
+
+        adapter = mock_session.mount.call_args_list[0].args[1]
+        assert adapter.max_retries.total == 3
+
+    @pytest.mark.parametrize("host, trusted", [
+        ("http://localhost:8080", False),
+        ("http://127.0.0.1:8080", False),
+        ("http://qbittorrent:8080", True),
+    ])
+    def test_trust_env_disabled_for_localhost(self, host, trusted):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        mock_session.trust_env = True
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session):
+            orphan_detector.Qbit(host, "admin", "pass")
+
+        assert mock_session.trust_env is trusted
+
     def test_login_failure_exits(self):
         """Cover lines 94-97: login fails when no SID cookie set"""
         import orphan_detector
@@ -399,7 +787,7 @@ class TestQbit:
 
         torrent_data = [{"hash": "abc123", "category": "Films"}]
         mock_get_resp = MagicMock()
-        mock_get_resp.json.return_value = torrent_data
+        mock_get_resp.content = json.dumps(torrent_data).encode()
         mock_get_resp.raise_for_status = MagicMock()
         mock_session.get.return_value = mock_get_resp
 
@@ -422,7 +810,7 @@ class TestQbit:
 
         file_data = [{"name": "Movie/movie.mkv"}]
         mock_get_resp = MagicMock()
-        mock_get_resp.json.return_value = file_data
+        mock_get_resp.content = json.dumps(file_data).encode()
         mock_get_resp.raise_for_status = MagicMock()
         mock_session.get.return_value = mock_get_resp
 
@@ -462,10 +850,10 @@ class TestFetchTorrentFiles:
             resp = MagicMock()
             resp.raise_for_status = MagicMock()
             if "torrents/info" in url:
-                resp.json.return_value = torrents
+                resp.content = json.dumps(torrents).encode()
             elif "torrents/files" in url:
                 h = kwargs["params"]["hash"]
-                resp.json.return_value = files_map[h]
+                resp.content = json.dumps(files_map[h]).encode()
             return resp
 
         mock_session.get.side_effect = mock_get
@@ -479,6 +867,170 @@ class TestFetchTorrentFiles:
         assert "random/file.mkv" in result["__UNCATEGORIZED__"]
 
 
+    def _fetch(self, torrents, cache):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        fetched = []
+
+        def mock_get(url, **kwargs):
+            resp = MagicMock()
+            if "torrents/info" in url:
+                resp.content = json.dumps(torrents).encode()
+            else:
+                fetched.append(kwargs["params"]["hash"])
+                resp.content = json.dumps([{"name": "New/New.mkv"}]).encode()
+            return resp
+
+        mock_session.get.side_effect = mock_get
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session):
+            qbit = orphan_detector.Qbit("http://localhost:8080", "admin", "pass")
+            result = orphan_detector.fetch_torrent_files(qbit, cache)
+        return result, fetched
+
+    def test_cached_hashes_are_not_refetched(self):
+        torrents = [
+            {"hash": "aaa", "category": "Films", "progress": 1, "total_size": 10},
+            {"hash": "bbb", "category": "Films", "progress": 1, "total_size": 20},
+        ]
+        cache = {"aaa": {"stamp": [10, None], "files": ["old/old.mkv"]}}
+
+        result, fetched = self._fetch(torrents, cache)
+
+        assert fetched == ["bbb"]
+        assert result["Films"] == {"old/old.mkv", "new/new.mkv"}
+        assert cache["bbb"] == {"stamp": [20, None], "files": ["new/new.mkv"]}
+
+    def test_stale_and_incomplete_torrents_are_refetched(self):
+        torrents = [
+            {"hash": "aaa", "category": "Films", "progress": 1, "total_size": 99},
+            {"hash": "bbb", "category": "Films", "progress": 0.5, "total_size": 20},
+        ]
+        cache = {
+            "aaa": {"stamp": [10, None], "files": ["old/old.mkv"]},
+            "bbb": {"stamp": [20, None], "files": ["old/old.mkv"]},
+            "gone": {"stamp": [30, None], "files": ["gone.mkv"]},
+        }
+
+        result, fetched = self._fetch(torrents, cache)
+
+        assert sorted(fetched) == ["aaa", "bbb"]
+        assert result["Films"] == {"new/new.mkv"}
+        # Unfinished and removed torrents are not kept
+        assert set(cache) == {"aaa"}
+
+    def test_malformed_entries_are_refetched(self):
+        torrents = [{"hash": h, "category": "Films", "progress": 1}
+                    for h in ("aaa", "bbb", "ccc", "ddd")]
+        cache = {
+            "aaa": "x",
+            "bbb": {"stamp": [None, None]},
+            "ccc": {"stamp": [None, None], "files": "old.mkv"},
+            "ddd": {"stamp": [None, None], "files": [1]},
+        }
+
+        result, fetched = self._fetch(torrents, cache)
+
+        assert sorted(fetched) == ["aaa", "bbb", "ccc", "ddd"]
+        assert result["Films"] == {"new/new.mkv"}
+        assert cache["bbb"] == {"stamp": [None, None], "files": ["new/new.mkv"]}
+
+
+    def test_categories_filtered_server_side(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        listed = []
+
+        def mock_get(url, **kwargs):
+            resp = MagicMock()
+            if "torrents/info" in url:
+                category = kwargs["params"]["category"]
+                listed.append(category)
+                resp.content = json.dumps([{"hash": category or "none",
+                                            "category": category}]).encode()
+            else:
+                h = kwargs["params"]["hash"]
+                resp.content = json.dumps([{"name": f"{h}.mkv"}]).encode()
+            return resp
+
+        mock_session.get.side_effect = mock_get
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session):
+            qbit = orphan_detector.Qbit("http://localhost:8080", "admin", "pass")
+            result = orphan_detector.fetch_torrent_files(
+                qbit, categories=["Films", "__UNCATEGORIZED__"])
+
+        assert listed == ["Films", ""]
+        assert result == {"Films": {"films.mkv"}, "__UNCATEGORIZED__": {"none.mkv"}}
+
+
+    def test_subcategories_skipped_and_hashes_deduplicated(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        by_category = {
+            # qBittorrent with subcategories returns children of a parent
+            "Films": [{"hash": "aaa", "category": "Films"},
+                      {"hash": "bbb", "category": "Films/4K"},
+                      {"hash": "ccc", "category": "Films/Extras"}],
+            "Films/4K": [{"hash": "bbb", "category": "Films/4K"}],
+        }
+        fetched = []
+
+        def mock_get(url, **kwargs):
+            resp = MagicMock()
+            if "torrents/info" in url:
+                resp.content = json.dumps(by_category[kwargs["params"]["category"]]).encode()
+            else:
+                h = kwargs["params"]["hash"]
+                fetched.append(h)
+                resp.content = json.dumps([{"name": f"{h}.mkv"}]).encode()
+            return resp
+
+        mock_session.get.side_effect = mock_get
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session):
+            qbit = orphan_detector.Qbit("http://localhost:8080", "admin", "pass")
+            result = orphan_detector.fetch_torrent_files(
+                qbit, categories=["Films", "Films/4K"])
+
+        assert sorted(fetched) == ["aaa", "bbb"]
+        assert result == {"Films": {"aaa.mkv"}, "Films/4K": {"bbb.mkv"}}
+
+
+class TestCacheFile:
+    def test_round_trip(self):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "sub" / "files.json"
+            data = {"aaa": {"stamp": [1, "/x"], "files": ["a.mkv"]}}
+            orphan_detector.save_cache(path, data)
+            assert orphan_detector.load_cache(path) == data
+            assert not (Path(tmpdir) / "sub" / "files.json.tmp").exists()
+
+    def test_missing_file(self):
+        import orphan_detector
+        assert orphan_detector.load_cache(Path("/nonexistent/files.json")) == {}
+
+    def test_corrupt_file_ignored(self, capsys):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "files.json"
+            path.write_text("{not json", encoding="utf-8")
+            assert orphan_detector.load_cache(path) == {}
+        assert "Ignoring unreadable cache" in capsys.readouterr().out
+
+    def test_unwritable_location_warns(self, capsys):
+        import orphan_detector
+        with tempfile.TemporaryDirectory() as tmpdir:
+            blocker = Path(tmpdir) / "blocker"
+            blocker.touch()
+            orphan_detector.save_cache(blocker / "files.json", {})
+        assert "Could not write cache" in capsys.readouterr().out
+
+
 class TestMain:
     def test_main_no_orphans(self, capsys):
         """Cover lines 198-205: main with no orphans."""
@@ -489,7 +1041,7 @@ class TestMain:
         mock_session.post.return_value = mock_login_resp
 
         mock_get_resp = MagicMock()
-        mock_get_resp.json.return_value = []
+        mock_get_resp.content = json.dumps([]).encode()
         mock_get_resp.raise_for_status = MagicMock()
         mock_session.get.return_value = mock_get_resp
 
@@ -497,6 +1049,7 @@ class TestMain:
              patch.object(orphan_detector, "QBIT_HOST", "http://localhost:8080"), \
              patch.object(orphan_detector, "QBIT_USER", "admin"), \
              patch.object(orphan_detector, "QBIT_PASS", "pass"), \
+             patch.object(orphan_detector, "CACHE_DIR", ""), \
              patch.object(orphan_detector, "CATEGORY_MAP", {}):
             orphan_detector.main()
 
@@ -518,7 +1071,7 @@ class TestMain:
             mock_session.post.return_value = mock_login_resp
 
             mock_get_resp = MagicMock()
-            mock_get_resp.json.return_value = []
+            mock_get_resp.content = json.dumps([]).encode()
             mock_get_resp.raise_for_status = MagicMock()
             mock_session.get.return_value = mock_get_resp
 
@@ -526,6 +1079,7 @@ class TestMain:
                  patch.object(orphan_detector, "QBIT_HOST", "http://localhost:8080"), \
                  patch.object(orphan_detector, "QBIT_USER", "admin"), \
                  patch.object(orphan_detector, "QBIT_PASS", "pass"), \
+                 patch.object(orphan_detector, "CACHE_DIR", ""), \
                  patch.object(orphan_detector, "CATEGORY_MAP", {"TestCat": root}), \
                  patch.object(orphan_detector, "IGNORE_SUFFIXES", set()), \
                  patch.object(orphan_detector, "EXCLUDE_PATTERNS", []):
@@ -536,6 +1090,45 @@ class TestMain:
             assert "orphan.mkv" in captured.out
             assert "KiB" in captured.out
 
+    def test_main_uses_size_from_walk(self, capsys):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        mock_session.get.return_value.content = json.dumps([]).encode()
+
+        fake_orphans = {"TestCat": {Path("/nonexistent/known.mkv"): 3 * 1024 ** 2}}
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session), \
+             patch.object(orphan_detector, "CACHE_DIR", ""), \
+             patch("orphan_detector.detect_orphans", return_value=fake_orphans):
+            orphan_detector.main()
+
+        captured = capsys.readouterr()
+        assert "known.mkv" in captured.out
+        assert "3 MiB" in captured.out
+
+    def test_main_report_layout(self, capsys):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        mock_session.get.return_value.content = b"[]"
+
+        fake_orphans = {
+            "Shows": {Path("/s/b.mkv"): 1, Path("/s/a.mkv"): 2048},
+            "Films": {Path("/f/x.mkv"): 5},
+        }
+
+        with patch("orphan_detector.requests.Session", return_value=mock_session), \
+             patch.object(orphan_detector, "CACHE_DIR", ""), \
+             patch("orphan_detector.detect_orphans", return_value=fake_orphans):
+            orphan_detector.main()
+
+        assert capsys.readouterr().out == (
+            f"\n===== Films =====\n{Path('/f/x.mkv')}    (5 B)\n"
+            f"\n===== Shows =====\n{Path('/s/a.mkv')}    (2 KiB)\n"
+            f"{Path('/s/b.mkv')}    (1 B)\n"
+        )
+
     def test_main_orphan_file_not_found(self, capsys):
         """Cover lines 213-215: file disappears during run."""
         import orphan_detector
@@ -546,19 +1139,76 @@ class TestMain:
         mock_session.post.return_value = mock_login_resp
 
         mock_get_resp = MagicMock()
-        mock_get_resp.json.return_value = []
+        mock_get_resp.content = json.dumps([]).encode()
         mock_get_resp.raise_for_status = MagicMock()
         mock_session.get.return_value = mock_get_resp
 
-        fake_orphans = {"TestCat": [Path("/nonexistent/vanishing.mkv")]}
+        fake_orphans = {"TestCat": {Path("/nonexistent/vanishing.mkv"): None}}
 
         with patch("orphan_detector.requests.Session", return_value=mock_session), \
              patch.object(orphan_detector, "QBIT_HOST", "http://localhost:8080"), \
              patch.object(orphan_detector, "QBIT_USER", "admin"), \
              patch.object(orphan_detector, "QBIT_PASS", "pass"), \
+             patch.object(orphan_detector, "CACHE_DIR", ""), \
              patch("orphan_detector.detect_orphans", return_value=fake_orphans):
             orphan_detector.main()
 
         captured = capsys.readouterr()
         assert "vanishing.mkv" in captured.out
         assert "missing?" in captured.out
+
+    def test_main_writes_cache(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+
+        def mock_get(url, **kwargs):
+            resp = MagicMock()
+            if "torrents/info" in url:
+                resp.content = json.dumps([{"hash": "aaa", "category": "Films",
+                                            "progress": 1, "total_size": 1}]).encode()
+            else:
+                resp.content = json.dumps([{"name": "Film/film.mkv"}]).encode()
+            return resp
+
+        mock_session.get.side_effect = mock_get
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch("orphan_detector.requests.Session", return_value=mock_session), \
+             patch.object(orphan_detector, "CACHE_DIR", tmpdir), \
+             patch.object(orphan_detector, "FILES_CACHE", True), \
+             patch.object(orphan_detector, "CATEGORY_MAP", {"Films": Path(tmpdir) / "films"}):
+            orphan_detector.main()
+            cache = orphan_detector.load_cache(Path(tmpdir) / "files.json")
+
+        assert cache == {"aaa": {"stamp": [1, None], "files": ["film/film.mkv"]}}
+
+    def test_main_files_cache_off_by_default(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        mock_session.get.return_value.content = b"[]"
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch("orphan_detector.requests.Session", return_value=mock_session), \
+             patch.object(orphan_detector, "CACHE_DIR", tmpdir), \
+             patch.object(orphan_detector, "FILES_CACHE", False), \
+             patch.object(orphan_detector, "CATEGORY_MAP", {"Films": Path(tmpdir) / "films"}):
+            orphan_detector.main()
+            assert not (Path(tmpdir) / "files.json").exists()
+
+    def test_main_writes_scan_cache(self):
+        import orphan_detector
+        mock_session = MagicMock()
+        mock_session.cookies = _gen_cookies_with_sid(qbit_ver_gte_5_2=True)
+        mock_session.get.return_value.content = b"[]"
+
+        with tempfile.TemporaryDirectory() as tmpdir, \
+             patch("orphan_detector.requests.Session", return_value=mock_session), \
+             patch.object(orphan_detector, "CACHE_DIR", tmpdir), \
+             patch.object(orphan_detector, "SCAN_CACHE", True), \
+             patch.object(orphan_detector, "CATEGORY_MAP", {"Films": Path(tmpdir)}):
+            orphan_detector.main()
+            scan_cache = orphan_detector.load_cache(Path(tmpdir) / "scan.json")
+
+        assert set(scan_cache) == {tmpdir}